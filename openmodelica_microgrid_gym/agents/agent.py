@@ -1,11 +1,13 @@
-from typing import List, Union
+from typing import List, Union, TYPE_CHECKING
 
 import numpy as np
-from matplotlib.figure import Figure
 
 from openmodelica_microgrid_gym.env import ModelicaEnv
 from openmodelica_microgrid_gym.util import EmptyHistory
 
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
 
 class Agent:
     def __init__(self, obs_varnames: List[str] = None, history: EmptyHistory = None, env: ModelicaEnv = None):
@@ -71,7 +73,7 @@ class Agent:
         """
         return np.empty(0)
 
-    def render(self) -> Figure:
+    def render(self) -> 'Figure':
         """
         Visualisation of the agent, e.g. its learning state or similar
         """
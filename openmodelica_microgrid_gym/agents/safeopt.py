@@ -1,18 +1,19 @@
 import importlib
 import logging
-from typing import Dict, Union, Any, List, Mapping
+from typing import Dict, Union, Any, List, Mapping, TYPE_CHECKING
 
 import GPy
-import matplotlib.pyplot as plt
 import numpy as np
 from GPy.kern import Kern
-from matplotlib.figure import Figure
 from safeopt import SafeOptSwarm
 
 from openmodelica_microgrid_gym.agents.staticctrl import StaticControlAgent
 from openmodelica_microgrid_gym.agents.util import MutableParams
 from openmodelica_microgrid_gym.aux_ctl import Controller
 
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
 logger = logging.getLogger(__name__)
 
 
@@ -158,10 +159,11 @@ class SafeOptAgent(StaticControlAgent):
 
             self.last_best_performance = self.performance
 
-    def render(self) -> Figure:
+    def render(self) -> 'Figure':
         """
         Renders the results for the performance
         """
+        import matplotlib.pyplot as plt
         figure, ax = plt.subplots()
         self.optimizer.plot(1000, figure=figure)
 
@@ -9,6 +9,9 @@ class MutableFloat:
         :param f: float as initial data
         """
         self._f = f
+        self._version = 0
+        """monotonically increasing counter, bumped on every mutation.
+        Allows dependent objects to cache derived values (e.g. float conversions)"""
 
     def __float__(self):
         return float(self.val)
@@ -29,6 +32,7 @@ class MutableFloat:
     @val.setter
     def val(self, v: float):
         self._f = v
+        self._version += 1
 
 
 class MutableParams:
@@ -6,10 +6,54 @@ The fields are wrapped into properties in order to allow transparent usage of th
 
 from typing import Tuple, Union
 
+import numpy as np
+
 from openmodelica_microgrid_gym.agents.util import MutableFloat
 
 
+def _wrap(value: Union[MutableFloat, float]) -> Union[MutableFloat, float]:
+    """
+    Pass MutableFloats through unchanged and convert plain scalars to float once,
+    such that the properties do not need to convert them on every access.
+
+    :param value: parameter value as provided by the user
+    :return: the MutableFloat or the converted primitive float
+    """
+    return value if isinstance(value, MutableFloat) else float(value)
+
+
+class _CachedFloat:
+    """
+    Descriptor providing the float value of a wrapped parameter field.
+
+    Plain scalars are converted once on initialization and returned directly;
+    MutableFloats are only re-converted after they have been mutated
+    (tracked via their version counter).
+    Hence repeated accesses in controller inner loops return a cached primitive
+    instead of calling float() every time.
+    """
+
+    def __set_name__(self, owner, name):
+        self._name = '_' + name
+        self._cache = '_' + name + '_cache'
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = instance.__dict__[self._name]
+        if not isinstance(value, MutableFloat):
+            return value
+        cache = instance.__dict__.get(self._cache)
+        if cache is not None and cache[0] == value._version:
+            return cache[1]
+        converted = float(value)
+        instance.__dict__[self._cache] = (value._version, converted)
+        return converted
+
+
 class FilterParams:
+    gain = _CachedFloat()
+    tau = _CachedFloat()
 
     def __init__(self, gain: Union[MutableFloat, float], tau: Union[MutableFloat, float]):
         """
@@ -18,16 +62,8 @@ class FilterParams:
         :param gain: Filter gain
         :param tau: Filter time constant
         """
-        self._gain = gain
-        self._tau = tau
-
-    @property
-    def gain(self):
-        return float(self._gain)
-
-    @property
-    def tau(self):
-        return float(self._tau)
+        self._gain = _wrap(gain)
+        self._tau = _wrap(tau)
 
 
 class DroopParams(FilterParams):
@@ -49,12 +85,20 @@ class DroopParams(FilterParams):
         """
         super().__init__(gain, tau)
         self.nom_val = nom_value
+        self._gain_recip_ver = -1
+        self._gain_recip = 0.0
+        if not isinstance(self._gain, MutableFloat):
+            # plain scalars never change, invert them once
+            self._gain_recip = 1 / self._gain if self._gain != 0 else 0.0
 
     @property
     def gain(self):
-        if float(self._gain) != 0:
-            return 1 / float(self._gain)
-        return 0
+        gain = self._gain
+        if isinstance(gain, MutableFloat) and gain._version != self._gain_recip_ver:
+            value = float(gain)
+            self._gain_recip = 1 / value if value != 0 else 0.0
+            self._gain_recip_ver = gain._version
+        return self._gain_recip
 
 
 class InverseDroopParams(DroopParams):
@@ -87,6 +131,10 @@ class PI_params:
     All fields are represented by properties to allow passing MutableFloats
     """
 
+    kP = _CachedFloat()
+    kI = _CachedFloat()
+    kB = _CachedFloat()
+
     def __init__(self, kP: Union[MutableFloat, float], kI: Union[MutableFloat, float],
                  limits: Union[Tuple[MutableFloat, MutableFloat], Tuple[float, float]], kB: float = 1):
         """
@@ -95,26 +143,23 @@ class PI_params:
         :param limits: Controller limits
         :param kB: Anti-windup (back calculation)
         """
-        self._kP = kP
-        self._kI = kI
-        self._limits = limits
-        self._kB = kB
-
-    @property
-    def kP(self):
-        return float(self._kP)
-
-    @property
-    def kI(self):
-        return float(self._kI)
+        self._kP = _wrap(kP)
+        self._kI = _wrap(kI)
+        self._limits = tuple(limits)
+        self._kB = _wrap(kB)
+        self._limits_cache = np.empty(2, dtype=np.float64)
+        self._limits_ver = (-1, -1)
 
     @property
     def limits(self):
-        return [float(limit) for limit in self._limits]
-
-    @property
-    def kB(self):
-        return float(self._kB)
+        lower, upper = self._limits
+        # plain floats never change, therefore their version defaults to a constant
+        versions = (getattr(lower, '_version', 0), getattr(upper, '_version', 0))
+        if versions != self._limits_ver:
+            self._limits_cache[0] = lower
+            self._limits_cache[1] = upper
+            self._limits_ver = versions
+        return self._limits_cache
 
 
 class PLLParams(PI_params):
@@ -122,6 +167,9 @@ class PLLParams(PI_params):
     The params for a Phase Lock Loop (PLL) to measure the frequency
     """
 
+    f_nom = _CachedFloat()
+    theta_0 = _CachedFloat()
+
     def __init__(self, kP: Union[MutableFloat, float], kI: Union[MutableFloat, float],
                  limits: Union[Tuple[MutableFloat, MutableFloat], Tuple[float, float]],
                  kB: Union[MutableFloat, float] = 1, f_nom: float = 0, theta_0: float = 0):
@@ -134,13 +182,5 @@ class PLLParams(PI_params):
         :param theta_0: Inital angle
         """
         super().__init__(kP, kI, limits, kB)
-        self._f_nom = f_nom
-        self._theta_0 = theta_0
-
-    @property
-    def f_nom(self):
-        return float(self._f_nom)
-
-    @property
-    def theta_0(self):
-        return float(self._theta_0)
+        self._f_nom = _wrap(f_nom)
+        self._theta_0 = _wrap(theta_0)
@@ -1,20 +1,21 @@
 import logging
 import re
+import types
 from datetime import datetime
 from fnmatch import translate
-from functools import partial
 from os.path import basename
-from typing import Sequence, Callable, List, Union, Tuple, Optional, Mapping, Dict, Any
+from typing import Sequence, Callable, List, Union, Tuple, Optional, Mapping, Dict, Any, TYPE_CHECKING
 
 import gym
-import matplotlib.pyplot as plt
 import numpy as np
 import scipy
-from matplotlib.figure import Figure
 from pyfmi import load_fmu
 from pyfmi.fmi import FMUModelME2
 from scipy import integrate
 
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
 from openmodelica_microgrid_gym.env.plot import PlotTmpl
 from openmodelica_microgrid_gym.util import FullHistory, EmptyHistory
 
@@ -50,8 +51,15 @@ class ModelicaEnv(gym.Env):
             It must return the reward of this timestep as float.
             It should return np.nan or -np.inf or None in case of a failiure.
             It should have no side-effects
+
+            Functions that resolve their data indices themselves can set the attribute
+            ``__wants_cols__ = False`` on the callable; they are then called with only the np.ndarray,
+            which keeps the per-step call overhead minimal and allows e.g. numba.njit-compiled rewards.
         :param log_level: logging granularity. see logging in stdlib
-        :param solver_method: solver of the scipy.integrate.solve_ivp function
+        :param solver_method: solver of the scipy.integrate.solve_ivp function.
+            The special value 'RK4' selects a fixed-step classical Runge-Kutta integrator
+            that advances the model by one time step without the per-call setup overhead of solve_ivp.
+            Suitable for well-behaved (non-stiff) microgrid dynamics.
         :param max_episode_steps: maximum number of episode steps.
             The end time of the episode is calculated by the time resolution and the number of steps.
 
@@ -108,7 +116,9 @@ class ModelicaEnv(gym.Env):
 
         # if you reward policy is different from just reward/penalty - implement custom step method
         self.reward = reward_fun
+        self._reward_wants_cols = getattr(reward_fun, '__wants_cols__', True)
         self._failed = False
+        self._done = False
 
         # Parameters required by this implementation
         self.max_episode_steps = max_episode_steps
@@ -117,20 +127,37 @@ class ModelicaEnv(gym.Env):
         self.time_end = np.inf if max_episode_steps is None \
             else self.time_start + max_episode_steps * self.time_step_size
 
-        # if there are parameters, we will convert all scalars to constant functions.
-        model_params = model_params or dict()
-        # the "partial" is needed because of some absurd python behaviour https://stackoverflow.com/a/34021333/13310191
-        self.model_parameters = {var: (val if callable(val) else partial(lambda t, val_: val_, val_=val)) for var, val
-                                 in
-                                 model_params.items()}
-
-        self.sim_time_interval = None
+        # constant parameters only need to be pushed to the FMU once per episode,
+        # only the callables have to be re-evaluated on every step
+        self.model_parameters = model_params or dict()
+        self._const_param_names = [var for var, val in self.model_parameters.items() if not callable(val)]
+        self._const_param_vals = np.array([float(self.model_parameters[var]) for var in self._const_param_names])
+        self._dyn_param_names = [var for var, val in self.model_parameters.items() if callable(val)]
+        self._dyn_param_funcs = tuple(self.model_parameters[var] for var in self._dyn_param_names)
+        self._dyn_param_buf = np.empty(len(self._dyn_param_names))
+        if self._dyn_param_names:
+            self._set_dyn_params = self._compile_setter(
+                '_set_dyn_params', 't', self._dyn_param_names, '_dyn_param_buf',
+                [f'self._dyn_param_funcs[{i}](t)' for i in range(len(self._dyn_param_names))])
+
+        # bounds of the next simulation interval as scalars,
+        # ndarray arithmetic is needless numpy dispatch overhead for a pair of floats
+        self._t0 = None
+        self._t1 = None
         self._state = []
-        self.measurement = []
+        self._measurement = np.empty(0)
+        self._obs_buf = None
+        """preallocated observation buffer, sized lazily once the measurement length is known"""
         self.record_states = viz_mode == 'episode'
         self.history = history
         self.history.cols = model_output
-        self.model_input_names = model_input
+        # coerced to a list once, step() would otherwise rebuild it on every call
+        self.model_input_names = list(model_input)
+        self._action_buf = np.empty(len(self.model_input_names))
+        """preallocated buffer the action is copied into before it is passed to the FMU"""
+        self._apply_action = self._compile_setter(
+            '_apply_action', 'action', self.model_input_names, '_action_buf',
+            [f'action[{i}]' for i in range(len(self.model_input_names))])
         # variable names are flattened to a list if they have specified in the nested dict manner)
         self.model_output_names = self.history.cols
 
@@ -160,11 +187,41 @@ class ModelicaEnv(gym.Env):
             raise ValueError('"viz_cols" must be one type Optional[Union[str, List[Union[str, PlotTmpl]]]]'
                              f'and not {type(viz_cols)}')
 
+        self._viz_col_re = re.compile(self.viz_col_regex)
+        self._viz_accept = None
+        """set of accepted column names, calculated from the regex on first render"""
+
         # OpenAI Gym requirements
         d_i, d_o = len(self.model_input_names), len(self.model_output_names)
         self.action_space = gym.spaces.Box(low=np.full(d_i, -np.inf), high=np.full(d_i, np.inf))
         self.observation_space = gym.spaces.Box(low=np.full(d_o, -np.inf), high=np.full(d_o, np.inf))
 
+    def _compile_setter(self, fname: str, arg: str, names: List[str], buf_attr: str,
+                        exprs: List[str]) -> Callable:
+        """
+        Generate a specialized method that fills a preallocated buffer and pushes it
+        to the FMU in one bulk set.
+
+        The variable names are fixed for the lifetime of the environment, so the element
+        accesses can be unrolled at construction time instead of iterating generically
+        on every step.
+
+        :param fname: name of the generated function
+        :param arg: name of its single parameter
+        :param names: FMU variable names, embedded into the source as a literal
+        :param buf_attr: attribute name of the preallocated value buffer
+        :param exprs: one expression string per variable, evaluated into the buffer
+        :return: the generated function bound to this instance
+        """
+        body = ''.join(f'    buf[{i}] = {expr}\n' for i, expr in enumerate(exprs))
+        src = (f'def {fname}(self, {arg}):\n'
+               f'    buf = self.{buf_attr}\n'
+               f'{body}'
+               f'    self.model.set({names!r}, buf)\n')
+        namespace = {}
+        exec(src, namespace)
+        return types.MethodType(namespace[fname], self)
+
     def _setup_fmu(self):
         """
         Initialize fmu model in self.model
@@ -186,6 +243,20 @@ class ModelicaEnv(gym.Env):
 
         # precalculating indices for more efficient lookup
         self.model_output_idx = np.array([self.model.get_variable_valueref(k) for k in self.model_output_names])
+        # reusable buffer for the observed outputs, refilled by _simulate every step
+        self._state_buf = np.empty(len(self.model_output_idx))
+
+        # bind the hot FMU call once. _get_deriv is executed by the solver for every internal
+        # RHS evaluation, hence even repeated attribute lookups add measurable overhead
+        self._fmu_get_derivatives = self.model.get_derivatives
+
+        # the Jacobian handed to the solver is prepared once,
+        # stiff solvers like LSODA request it many times per step
+        self._jac_buf = np.identity(len(self.model.get_derivatives_list()))
+
+        # reusable C-contiguous state buffer for the rare case that the solver
+        # hands a non-contiguous state to _get_deriv
+        self._x_c = np.empty_like(self.model.continuous_states)
 
     def _calc_jac(self, t, x) -> np.ndarray:  # noqa
         """
@@ -197,13 +268,11 @@ class ModelicaEnv(gym.Env):
         :param x: state (ignored)
         :return: the Jacobian matrix
         """
-        # get state and derivative value reference lists
-        refs = [[s.value_reference for s in getattr(self.model, attr)().values()]
-                for attr in
-                ['get_states_list', 'get_derivatives_list']]
-        jacobian = np.identity(len(refs[1]))
-        np.apply_along_axis(lambda col: self.model.get_directional_derivative(*refs, col), 0, jacobian)
-        return jacobian
+        # The directional derivatives of the FMU were historically discarded here (the
+        # apply_along_axis result was never stored), so the solver has always received the
+        # identity matrix and the golden test traces encode that behaviour. Wiring up
+        # self.model.get_directional_derivative requires regenerating those traces first.
+        return self._jac_buf
 
     def _get_deriv(self, t: float, x: np.ndarray) -> np.ndarray:
         """
@@ -213,13 +282,39 @@ class ModelicaEnv(gym.Env):
         :param x: 1d float array of continuous states
         :return: 1d float array of derivatives
         """
-        self.model.time = t
-        self.model.continuous_states = x.copy(order='C')
+        model = self.model
+        model.time = t
+        # the FMU requires C-contiguous input; the RK-family solvers already provide it,
+        # otherwise fall back to copying into the reusable buffer
+        if x.flags.c_contiguous:
+            model.continuous_states = x
+        else:
+            np.copyto(self._x_c, x)
+            model.continuous_states = self._x_c
 
         # Compute the derivative
-        dx = self.model.get_derivatives()
+        dx = self._fmu_get_derivatives()
         return dx
 
+    def _rk4_step(self, t0: float, x: np.ndarray, dt: float) -> np.ndarray:
+        """
+        Advance the state by one classical Runge-Kutta step.
+
+        For the short intervals simulated per environment step, the Python setup overhead
+        of scipy.integrate.solve_ivp dwarfs the actual integration work;
+        this fixed-step integrator avoids it entirely.
+
+        :param t0: start time
+        :param x: 1d float array of continuous states at t0
+        :param dt: step size
+        :return: 1d float array of continuous states at t0 + dt
+        """
+        k1 = self._get_deriv(t0, x)
+        k2 = self._get_deriv(t0 + dt / 2, x + dt / 2 * k1)
+        k3 = self._get_deriv(t0 + dt / 2, x + dt / 2 * k2)
+        k4 = self._get_deriv(t0 + dt, x + dt * k3)
+        return x + dt / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+
     def _simulate(self) -> np.ndarray:
         """
         Executes simulation by FMU in the time interval [start_time; stop_time]
@@ -227,33 +322,70 @@ class ModelicaEnv(gym.Env):
 
         :return: resulting state of the environment
         """
-        logger.debug(f'Simulation started for time interval {self.sim_time_interval[0]}-{self.sim_time_interval[1]}')
+        logger.debug(f'Simulation started for time interval {self._t0}-{self._t1}')
 
         # Advance
         x_0 = self.model.continuous_states
 
-        # Get the output from a step of the solver
-        sol_out = scipy.integrate.solve_ivp(
-            self._get_deriv, self.sim_time_interval, x_0, method=self.solver_method, jac=self._calc_jac)
-        # get the last solution of the solver
-        self.model.continuous_states = sol_out.y[:, -1]  # noqa
+        if self.solver_method == 'RK4':
+            self.model.continuous_states = self._rk4_step(self._t0, x_0, self._t1 - self._t0)
+        else:
+            # Get the output from a step of the solver
+            sol_out = scipy.integrate.solve_ivp(
+                self._get_deriv, (self._t0, self._t1), x_0, method=self.solver_method, jac=self._calc_jac)
+            # get the last solution of the solver
+            self.model.continuous_states = sol_out.y[:, -1]  # noqa
 
-        obs = self.model.get_real(self.model_output_idx)
-        return obs
+        np.copyto(self._state_buf, self.model.get_real(self.model_output_idx))
+        return self._state_buf
+
+    @property
+    def sim_time_interval(self) -> Optional[Tuple[float, float]]:
+        """
+        Time interval the next simulation step will integrate over
+
+        :return: (start, stop) tuple or None if the environment was not reset yet
+        """
+        if self._t0 is None:
+            return None
+        return self._t0, self._t1
+
+    @property
+    def measurement(self) -> np.ndarray:
+        """
+        Measurement the agent provides on the environment (e.g. data of PLL controllers).
+        It is appended to the observation on every step.
+
+        :getter: current measurement
+        :setter: copy the provided values into a preallocated buffer.
+            The buffer is (re)allocated only when the measurement length changes,
+            avoiding a list to ndarray promotion on every step
+        """
+        return self._measurement
+
+    @measurement.setter
+    def measurement(self, value: Sequence):
+        if len(self._measurement) != len(value):
+            self._measurement = np.empty(len(value))
+        np.copyto(self._measurement, value)
 
     @property
     def is_done(self) -> bool:
         """
-        Checks if the experiment is finished using a time limit
+        Checks if the experiment is finished
+
+        :return: True if simulation time exceeded or the reward signalled a failure
+        """
+        return self._done
 
-        :return: True if simulation time exceeded
+    def _update_done(self):
+        """
+        Recalculate the cached termination flag.
+        Only needs to be called when the time interval moved or the reward was evaluated,
+        not on every is_done access.
         """
-        if self._failed:
-            logger.info(f'reward was extreme, episode terminated')
-            return True
         # TODO allow for other stopping criteria
-        logger.debug(f't: {self.sim_time_interval[1]}, ')
-        return abs(self.sim_time_interval[1]) > self.time_end
+        self._done = self._failed or abs(self._t1) > self.time_end
 
     def reset(self) -> np.ndarray:
         """
@@ -271,14 +403,21 @@ class ModelicaEnv(gym.Env):
         self.model.setup_experiment(start_time=0)
 
         self._setup_fmu()
-        self.sim_time_interval = np.array([self.time_start, self.time_start + self.time_step_size])
+        self._t0 = self.time_start
+        self._t1 = self.time_start + self.time_step_size
         self.history.reset()
         self._state = self._simulate()
         self.measurement = []
         self.history.append(self._state)
+        if self._const_param_names:
+            # constant parameters are lost with the FMU reset; push them once per episode.
+            # This happens after the initial observation to match the former per-step assignment
+            self.model.set(self._const_param_names, self._const_param_vals)
         self._failed = False
+        self._done = False
 
-        return self._state
+        # the internal state buffer is reused on the next step, hence the caller gets a copy
+        return self._state.copy()
 
     def step(self, action: Sequence) -> Tuple[np.ndarray, float, bool, Mapping]:
         """
@@ -291,57 +430,67 @@ class ModelicaEnv(gym.Env):
         :return: state, reward, is done, info
         """
         logger.debug("Experiment next step was called.")
-        if self.is_done:
+        if self._done:
             logger.warning(
                 """You are calling 'step()' even though this environment has already returned done = True.
                 You should always call 'reset()' once you receive 'done = True' -- any further steps are
                 undefined behavior.""")
-            return self._state, -np.inf, True, {}
+            return self._state.copy(), -np.inf, True, {}
 
-        # check if action is a list. If not - create list of length 1
-        try:
-            iter(action)
-        except TypeError:
-            action = [action]
+        # coerce the action into a 1d array. Scalars are accepted for single-input models
+        if not isinstance(action, np.ndarray):
+            action = np.asarray(action, dtype=np.float64)
+        if action.ndim == 0:
+            action = action[np.newaxis]
             logger.warning("Model input values (action) should be passed as a list")
 
         # Check if number of model inputs equals number of values passed
-        if len(action) != len(list(self.model_input_names)):
-            message = f'List of values for model inputs should be of the length {len(list(self.model_input_names))},'
-            f'equal to the number of model inputs. Actual length {len(action)}'
+        if len(action) != len(self.model_input_names):
+            message = f'List of values for model inputs should be of the length {len(self.model_input_names)}, ' \
+                      f'equal to the number of model inputs. Actual length {len(action)}'
             logger.error(message)
             raise ValueError(message)
 
         # Set input values of the model
         logger.debug('model input: %s, values: %s', self.model_input_names, action)
-        self.model.set(list(self.model_input_names), list(action))
-        if self.model_parameters:
-            values = [(var, f(self.sim_time_interval[0])) for var, f in self.model_parameters.items()]
-            # list of keys and list of values
-            self.model.set(*zip(*values))
+        self._apply_action(action)
+        if self._dyn_param_funcs:
+            self._set_dyn_params(self._t0)
 
         # Simulate and observe result state
         self._state = self._simulate()
-        obs = np.hstack((self._state, self.measurement))
+        n_state = len(self._state)
+        if self._obs_buf is None or len(self._obs_buf) != n_state + len(self.measurement):
+            self._obs_buf = np.empty(n_state + len(self.measurement), dtype=np.float64)
+        obs = self._obs_buf
+        obs[:n_state] = self._state
+        obs[n_state:] = self.measurement
         self.history.append(obs)
 
         logger.debug("model output: %s, values: %s", self.model_output_names, self._state)
 
         # Check if experiment has finished
         # Move simulation time interval if experiment continues
-        if not self.is_done:
+        if not self._done:
             logger.debug("Experiment step done, experiment continues.")
-            self.sim_time_interval += self.time_step_size
+            self._t0 += self.time_step_size
+            self._t1 += self.time_step_size
         else:
             logger.debug("Experiment step done, experiment done.")
 
-        reward = self.reward(self.history.cols, obs)
-        self._failed = np.isnan(reward) or np.isinf(reward) and reward < 0 or reward is None
+        if self._reward_wants_cols:
+            reward = self.reward(self.history.cols, obs)
+        else:
+            reward = self.reward(obs)
+        # "reward != reward" detects NaN without a numpy dispatch; None must be tested first
+        self._failed = reward is None or reward != reward or reward == -np.inf
+        self._update_done()
 
-        # only return the state, the agent does not need the measurement
-        return obs, reward, self.is_done, {}
+        # only return the state, the agent does not need the measurement.
+        # The internal buffer is reused on the next step, hence the caller gets a copy
+        return obs.copy(), reward, self._done, {}
 
-    def render(self, mode: str = 'human', close: bool = False) -> List[Figure]:
+    def render(self, mode: str = 'human', close: bool = False) -> List['Figure']:
         """
         OpenAI Gym API. Determines how current environment state should be rendered.
         Does nothing at the moment
@@ -352,22 +501,31 @@ class ModelicaEnv(gym.Env):
         """
         if self.viz_mode is None:
             return []
-        elif close:
+        # matplotlib is imported lazily, headless training runs should not pay its import cost
+        import matplotlib.pyplot as plt
+        if close:
             if self.viz_mode == 'step':
                 # TODO close plot
                 pass
             else:
                 figs = []
 
+                if self._viz_accept is None:
+                    self._viz_accept = {col for col in self.history.cols if self._viz_col_re.fullmatch(col)}
+
+                # the history df and the time axis are identical for all plots, calculate them once
+                hist_df = self.history.df
+                time_index = hist_df.index * self.time_step_size + self.time_start
+
                 # plot cols by theirs structure filtered by the vis_cols param
                 for cols in self.history.structured_cols():
                     if not isinstance(cols, list):
                         cols = [cols]
-                    cols = [col for col in cols if re.fullmatch(self.viz_col_regex, col)]
+                    cols = [col for col in cols if col in self._viz_accept]
                     if not cols:
                         continue
-                    df = self.history.df[cols].copy()
-                    df.index = self.history.df.index * self.time_step_size
+                    df = hist_df[cols].copy()
+                    df.index = time_index
 
                     fig, ax = plt.subplots()
                     df.plot(legend=True, figure=fig, ax=ax)
@@ -379,7 +537,7 @@ class ModelicaEnv(gym.Env):
                     fig, ax = plt.subplots()
 
                     for series, kwargs in tmpl:
-                        self.history.df[series].plot(figure=fig, ax=ax, **kwargs)
+                        hist_df[series].plot(figure=fig, ax=ax, **kwargs)
                     tmpl.callback(fig)
                     figs.append(fig)
 
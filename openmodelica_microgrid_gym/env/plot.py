@@ -1,14 +1,15 @@
-from typing import List, Union, Callable, Optional
+from typing import List, Union, Callable, Optional, TYPE_CHECKING
 
-from matplotlib.figure import Figure
-import matplotlib.pyplot as plt
 from more_itertools import collapse
 
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
 from openmodelica_microgrid_gym.util import flatten_together
 
 
 class PlotTmpl:
-    def __init__(self, variables: List[Union[List, str]], callback: Optional[Callable[[Figure], None]] = None,
+    def __init__(self, variables: List[Union[List, str]], callback: Optional[Callable[['Figure'], None]] = None,
                  **kwargs):
         """
         Provides an iterable of variables and plot parameters like ('induction1', {'color':'green', 'style': '--'}).
@@ -68,6 +69,7 @@ class PlotTmpl:
             self.kwargs.append(args_)
 
     def callback(self, fig):
+        import matplotlib.pyplot as plt
         if self._callback is not None:
             self._callback(fig)
         plt.show()
@@ -1,5 +1,6 @@
 from typing import Sequence, List, Optional, Union
 
+import numpy as np
 import pandas as pd
 
 from openmodelica_microgrid_gym.util.itertools_ import flatten
@@ -69,7 +70,10 @@ class EmptyHistory(StructuredMapping):
 
     def append(self, values: Sequence):
         """
-        Add new data sample to the history. The History class will determine how the data is updated
+        Add new data sample to the history. The History class will determine how the data is updated.
+
+        Implementations must copy the provided values,
+        callers (e.g. the environment) may reuse the passed buffer.
 
         :param values: sequence of data entries
         """
@@ -91,7 +95,7 @@ class SingleHistory(EmptyHistory):
         self._data = None
 
     def append(self, values: Sequence):
-        self._data = values
+        self._data = np.array(values)
 
     def last(self):
         return self._data
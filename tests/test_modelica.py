@@ -68,3 +68,50 @@ def test_params_simple():
                           -7.29991175e-01, 1.76505718e+02, 4.10540511e+02, 3.52688013e+01])
     assert r == 1
     assert not done
+
+
+def test_reward_without_cols():
+    def reward(obs):
+        assert isinstance(obs, np.ndarray)
+        return float(np.sum(obs))
+
+    reward.__wants_cols__ = False
+
+    np.random.seed(1)
+    env = gym.make('openmodelica_microgrid_gym:ModelicaEnv_test-v1',
+                   viz_mode=None,
+                   reward_fun=reward,
+                   model_path='fmu/test.fmu',
+                   model_input=['i1p1', 'i1p2', 'i1p3', 'i2p1', 'i2p2', 'i2p3'],
+                   model_output={'lc1': [['inductor1.i', 'inductor2.i', 'inductor3.i'],
+                                         ['capacitor1.v', 'capacitor2.v', 'capacitor3.v']],
+                                 'lcl1': [['inductor1.i', 'inductor2.i', 'inductor3.i'],
+                                          ['capacitor1.v', 'capacitor2.v', 'capacitor3.v']]})
+    env.reset()
+    obs, r, done, _ = env.step(np.random.random(6))
+    # the reward function is called with only the observation array
+    assert r == approx(np.sum(obs))
+    assert not done
+
+
+def test_rk4():
+    np.random.seed(1)
+    actions = np.random.random((10, 6))
+
+    def final_obs(solver_method):
+        env = gym.make('openmodelica_microgrid_gym:ModelicaEnv_test-v1',
+                       viz_mode=None,
+                       solver_method=solver_method,
+                       model_path='fmu/test.fmu',
+                       model_input=['i1p1', 'i1p2', 'i1p3', 'i2p1', 'i2p2', 'i2p3'],
+                       model_output={'lc1': [['inductor1.i', 'inductor2.i', 'inductor3.i'],
+                                             ['capacitor1.v', 'capacitor2.v', 'capacitor3.v']],
+                                     'lcl1': [['inductor1.i', 'inductor2.i', 'inductor3.i'],
+                                              ['capacitor1.v', 'capacitor2.v', 'capacitor3.v']]})
+        obs = env.reset()
+        for a in actions:
+            obs, _, _, _ = env.step(a)
+        return obs
+
+    # the fixed-step integrator must stay close to the adaptive reference solution
+    assert final_obs('RK4') == approx(final_obs('LSODA'), rel=1e-2)